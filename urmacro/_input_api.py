@@ -7,11 +7,43 @@ Usage:
 """
 
 import time
+import math
+import random
+import asyncio
+import atexit
+import threading
 import ctypes
 import ctypes.wintypes
+import numpy as np
 import win32gui
 import win32con
 import win32api
+import win32process
+from PIL import ImageGrab
+
+try:
+    import winocr
+except ImportError:
+    winocr = None  # dépendance optionnelle : pip install urmacro[ocr]
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None  # dépendance optionnelle : pip install urmacropkg[fast]
+
+from ._utils import _wait_until
+
+# WinDLL privés pour pouvoir fixer argtypes/restype sans toucher ctypes.windll
+_user32 = ctypes.WinDLL('user32')
+_gdi32 = ctypes.WinDLL('gdi32')
+
+_user32.FindWindowExW.argtypes = [ctypes.wintypes.HWND, ctypes.wintypes.HWND,
+                                  ctypes.wintypes.LPCWSTR, ctypes.wintypes.LPCWSTR]
+_user32.FindWindowExW.restype = ctypes.wintypes.HWND
+_user32.GetWindowTextLengthW.argtypes = [ctypes.wintypes.HWND]
+_user32.GetWindowTextW.argtypes = [ctypes.wintypes.HWND, ctypes.wintypes.LPWSTR, ctypes.c_int]
+_user32.IsWindowVisible.argtypes = [ctypes.wintypes.HWND]
+_user32.IsWindow.argtypes = [ctypes.wintypes.HWND]
 
 # DPI awareness : force Windows à retourner la résolution physique réelle
 try:
@@ -19,14 +51,27 @@ try:
 except Exception:
     ctypes.windll.user32.SetProcessDPIAware()
 
+# Résolution physique de l'écran principal, mise en cache une fois le DPI fixé
+# (évite deux appels GetSystemMetrics par événement dans smooth_move)
+_SCREEN_W = ctypes.windll.user32.GetSystemMetrics(0)
+_SCREEN_H = ctypes.windll.user32.GetSystemMetrics(1)
+
 
 # ============================================================================
 # FENÊTRES
 # ============================================================================
 
+# (title.lower(), partial) → (hwnd, full_title, perf_counter() de la recherche)
+_WIN_CACHE: dict = {}
+_WIN_CACHE_TTL = 2.0  # secondes
+_WIN_WALK_RETRIES = 3  # reprises du parcours si une fenêtre disparaît en route
+
+
 def find_window(title: str, partial: bool = True):
     """
     Trouve une fenêtre par son titre.
+    Le résultat est gardé en cache _WIN_CACHE_TTL secondes, tant que la fenêtre
+    existe toujours et que son titre correspond encore.
 
     Args:
         title:   Titre à rechercher.
@@ -35,26 +80,57 @@ def find_window(title: str, partial: bool = True):
     Returns:
         (hwnd, full_title) ou (None, None) si non trouvé.
     """
+    key = (title.lower(), partial)
+    cached = _WIN_CACHE.pop(key, None)
+    if cached is not None:
+        hwnd, _, found_at = cached
+        if time.perf_counter() - found_at < _WIN_CACHE_TTL and _user32.IsWindow(hwnd):
+            window_title = win32gui.GetWindowText(hwnd)
+            if partial:
+                still_matches = key[0] in window_title.lower() and _user32.IsWindowVisible(hwnd)
+            else:
+                still_matches = window_title.lower() == key[0]
+            if still_matches:
+                _WIN_CACHE[key] = cached
+                return hwnd, window_title
+
+    hwnd, window_title = _find_window_uncached(title, partial)
+    if hwnd:
+        _WIN_CACHE[key] = (hwnd, window_title, time.perf_counter())
+    return hwnd, window_title
+
+
+def _find_window_uncached(title: str, partial: bool):
     if not partial:
         hwnd = win32gui.FindWindow(None, title)
         if hwnd == 0:
             return None, None
         return hwnd, win32gui.GetWindowText(hwnd)
 
-    found_windows = []
-
-    def callback(hwnd, extra):
-        if win32gui.IsWindowVisible(hwnd):
-            window_title = win32gui.GetWindowText(hwnd)
-            if title.lower() in window_title.lower():
-                found_windows.append((hwnd, window_title))
-        return True
-
-    win32gui.EnumWindows(callback, None)
-
-    if not found_windows:
-        return None, None
-    return found_windows[0][0], found_windows[0][1]
+    # Parcours des fenêtres top-level dans l'ordre Z (comme EnumWindows),
+    # sans callback Python par fenêtre et avec arrêt au premier résultat
+    needle = title.lower()
+    buf = ctypes.create_unicode_buffer(256)
+    for _ in range(_WIN_WALK_RETRIES + 1):
+        hwnd = _user32.FindWindowExW(None, None, None, None)
+        while hwnd:
+            length = _user32.GetWindowTextLengthW(hwnd)
+            if length:
+                if length >= len(buf):
+                    buf = ctypes.create_unicode_buffer(length + 1)
+                _user32.GetWindowTextW(hwnd, buf, len(buf))
+                window_title = buf.value
+            else:
+                window_title = ''
+            if needle in window_title.lower() and _user32.IsWindowVisible(hwnd):
+                return hwnd, window_title
+            next_hwnd = _user32.FindWindowExW(None, hwnd, None, None)
+            if not next_hwnd and not _user32.IsWindow(hwnd):
+                break  # fenêtre détruite pendant le parcours : on recommence
+            hwnd = next_hwnd
+        else:
+            return None, None  # fin normale de la liste
+    return None, None
 
 
 def focus_window(title: str, partial: bool = True, full_scale: bool = False) -> bool:
@@ -75,8 +151,6 @@ def focus_window(title: str, partial: bool = True, full_scale: bool = False) ->
         return False
 
     try:
-        import win32process
-
         fg_hwnd = win32gui.GetForegroundWindow()
         fg_tid = win32process.GetWindowThreadProcessId(fg_hwnd)[0]
         my_tid = ctypes.windll.kernel32.GetCurrentThreadId()
@@ -161,35 +235,87 @@ def move(x: int, y: int) -> None:
 # SOURIS — SENDINPUT (vrais événements d'input)
 # ============================================================================
 
+# Structures SendInput, définies une seule fois (et non à chaque événement)
+_PUL = ctypes.POINTER(ctypes.c_ulong)
+
+
+class _KeyBdInput(ctypes.Structure):
+    _fields_ = [("wVk", ctypes.c_ushort), ("wScan", ctypes.c_ushort),
+                ("dwFlags", ctypes.c_ulong), ("time", ctypes.c_ulong),
+                ("dwExtraInfo", _PUL)]
+
+
+class _HardwareInput(ctypes.Structure):
+    _fields_ = [("uMsg", ctypes.c_ulong), ("wParamL", ctypes.c_short),
+                ("wParamH", ctypes.c_ushort)]
+
+
+class _MouseInput(ctypes.Structure):
+    _fields_ = [("dx", ctypes.c_long), ("dy", ctypes.c_long),
+                ("mouseData", ctypes.c_ulong), ("dwFlags", ctypes.c_ulong),
+                ("time", ctypes.c_ulong), ("dwExtraInfo", _PUL)]
+
+
+class _InputI(ctypes.Union):
+    _fields_ = [("ki", _KeyBdInput), ("mi", _MouseInput), ("hi", _HardwareInput)]
+
+
+class _Input(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_ulong), ("ii", _InputI)]
+
+
+_INPUT_SIZE = ctypes.sizeof(_Input)
+_extra = ctypes.c_ulong(0)
+_extra_ptr = ctypes.pointer(_extra)
+
+_SendInput = _user32.SendInput
+_SendInput.argtypes = [ctypes.wintypes.UINT, ctypes.POINTER(_Input), ctypes.c_int]
+_SendInput.restype = ctypes.wintypes.UINT
+
+
 def _mouse_send_input(dx: int, dy: int, flags: int) -> None:
     """Interne : envoie un événement souris via SendInput."""
-    PUL = ctypes.POINTER(ctypes.c_ulong)
+    inp = _Input(0, _InputI(mi=_MouseInput(dx, dy, 0, flags, 0, _extra_ptr)))
+    _SendInput(1, inp, _INPUT_SIZE)
+
+
+def _mouse_send_inputs(events) -> None:
+    """Interne : envoie une liste d'événements souris (dx, dy, flags) en un seul SendInput."""
+    n = len(events)
+    inputs = (_Input * n)()
+    for inp, (dx, dy, flags) in zip(inputs, events):
+        inp.ii.mi = _MouseInput(dx, dy, 0, flags, 0, _extra_ptr)  # type 0 = INPUT_MOUSE
+    _SendInput(n, inputs, _INPUT_SIZE)
 
-    class KeyBdInput(ctypes.Structure):
-        _fields_ = [("wVk", ctypes.c_ushort), ("wScan", ctypes.c_ushort),
-                    ("dwFlags", ctypes.c_ulong), ("time", ctypes.c_ulong),
-                    ("dwExtraInfo", PUL)]
 
-    class HardwareInput(ctypes.Structure):
-        _fields_ = [("uMsg", ctypes.c_ulong), ("wParamL", ctypes.c_short),
-                    ("wParamH", ctypes.c_ushort)]
+# Tables pixel → coordonnée normalisée (0-65535) de l'écran principal,
+# construites au premier déplacement absolu. Un seul global (x, y) : un autre
+# thread voit soit None, soit les deux tables complètes
+_NORM_TABLES = None
 
-    class MouseInput(ctypes.Structure):
-        _fields_ = [("dx", ctypes.c_long), ("dy", ctypes.c_long),
-                    ("mouseData", ctypes.c_ulong), ("dwFlags", ctypes.c_ulong),
-                    ("time", ctypes.c_ulong), ("dwExtraInfo", PUL)]
 
-    class Input_I(ctypes.Union):
-        _fields_ = [("ki", KeyBdInput), ("mi", MouseInput), ("hi", HardwareInput)]
+def _build_norm_tables():
+    global _NORM_TABLES
+    # Même calcul flottant que la formule directe, pour des valeurs identiques
+    norm_x = (np.arange(_SCREEN_W) * 65535 / (_SCREEN_W - 1)).astype(np.int64)
+    norm_y = (np.arange(_SCREEN_H) * 65535 / (_SCREEN_H - 1)).astype(np.int64)
+    _NORM_TABLES = (dict(enumerate(norm_x.tolist())), dict(enumerate(norm_y.tolist())))
+    return _NORM_TABLES
 
-    class Input(ctypes.Structure):
-        _fields_ = [("type", ctypes.c_ulong), ("ii", Input_I)]
 
-    extra = ctypes.c_ulong(0)
-    ii_ = Input_I()
-    ii_.mi = MouseInput(dx, dy, 0, flags, 0, ctypes.pointer(extra))
-    x_input = Input(ctypes.c_ulong(0), ii_)
-    ctypes.windll.user32.SendInput(1, ctypes.pointer(x_input), ctypes.sizeof(x_input))
+def _abs_move_event(x: int, y: int):
+    """Interne : événement (norm_x, norm_y, flags) pour un déplacement absolu."""
+    tables = _NORM_TABLES
+    if tables is None:
+        tables = _build_norm_tables()
+    norm_table_x, norm_table_y = tables
+    norm_x = norm_table_x.get(x)
+    if norm_x is None:  # hors écran principal ou coordonnée non entière
+        norm_x = int(x * 65535 / (_SCREEN_W - 1))
+    norm_y = norm_table_y.get(y)
+    if norm_y is None:
+        norm_y = int(y * 65535 / (_SCREEN_H - 1))
+    return norm_x, norm_y, 0x0001 | 0x8000  # MOVE | ABSOLUTE
 
 
 def send_input_move(x: int, y: int) -> None:
@@ -198,11 +324,7 @@ def send_input_move(x: int, y: int) -> None:
     Génère un vrai événement vu par DirectInput / raw input.
     Idéal pour les clics UI. Pour les caméras de jeu → send_input_delta.
     """
-    sw = ctypes.windll.user32.GetSystemMetrics(0)
-    sh = ctypes.windll.user32.GetSystemMetrics(1)
-    norm_x = int(x * 65535 / (sw - 1))
-    norm_y = int(y * 65535 / (sh - 1))
-    _mouse_send_input(norm_x, norm_y, 0x0001 | 0x8000)  # MOVE | ABSOLUTE
+    _mouse_send_input(*_abs_move_event(x, y))
 
 
 def send_input_delta(dx: int, dy: int) -> None:
@@ -213,7 +335,8 @@ def send_input_delta(dx: int, dy: int) -> None:
     _mouse_send_input(dx, dy, 0x0001)  # MOVE relatif
 
 
-def smooth_move(x: int, y: int, duration: float = 0.4, relative: bool = False) -> None:
+def smooth_move(x: int, y: int, duration: float = 0.4, relative: bool = False,
+                batched: bool = False, get_active_status=None) -> bool:
     """
     Déplace la souris de façon fluide (courbe de Bézier + easing sinusoïdal).
     Utilise SendInput — vrais événements d'input vus par les jeux.
@@ -222,13 +345,15 @@ def smooth_move(x: int, y: int, duration: float = 0.4, relative: bool = False) -
         x, y:     Position cible absolue, ou offset si relative=True.
         duration: Durée du mouvement en secondes (défaut : 0.4).
         relative: Si True, x/y sont ajoutés à la position courante.
-    """
-    import math
-    import random
+        batched:  Si True, envoie toute la trajectoire en un seul appel SendInput,
+                  sans attente entre les pas (duration est alors ignorée).
+        get_active_status: Fonction optionnelle ; si elle retourne False,
+                           le mouvement est interrompu.
 
-    point = ctypes.wintypes.POINT()
-    ctypes.windll.user32.GetCursorPos(ctypes.byref(point))
-    start_x, start_y = point.x, point.y
+    Returns:
+        True si le mouvement est allé au bout, False s'il a été interrompu.
+    """
+    start_x, start_y = get_cursor_pos()
 
     target_x = start_x + x if relative else x
     target_y = start_y + y if relative else y
@@ -242,7 +367,7 @@ def smooth_move(x: int, y: int, duration: float = 0.4, relative: bool = False) -
             send_input_delta(int(dx), int(dy))
         else:
             send_input_move(target_x, target_y)
-        return
+        return True
 
     deviation = 0.0 if relative else random.uniform(-0.15, 0.15) * dist
     if relative:
@@ -254,41 +379,58 @@ def smooth_move(x: int, y: int, duration: float = 0.4, relative: bool = False) -
 
     steps = max(15, int(duration * 120))
 
+    # Trajectoire précalculée d'un bloc (NumPy) : un événement (ou None) par pas,
+    # puis un événement final
+    t = np.arange(1, steps + 1) / steps
+    eased = (1 - np.cos(t * np.pi)) / 2
+    inv = 1 - eased
+
     if relative:
-        prev_bx, prev_by = 0.0, 0.0
-        acc_x, acc_y = 0.0, 0.0
-        for i in range(1, steps + 1):
-            t = i / steps
-            eased = (1 - math.cos(t * math.pi)) / 2
-            inv = 1 - eased
-            bx = 2 * inv * eased * mid_bx + eased * eased * x
-            by = 2 * inv * eased * mid_by + eased * eased * y
-            acc_x += bx - prev_bx
-            acc_y += by - prev_by
-            prev_bx, prev_by = bx, by
-            send_dx = int(acc_x)
-            send_dy = int(acc_y)
-            if send_dx != 0 or send_dy != 0:
-                send_input_delta(send_dx, send_dy)
-                acc_x -= send_dx
-                acc_y -= send_dy
-            time.sleep(duration / steps)
-        send_dx = round(acc_x)
-        send_dy = round(acc_y)
-        if send_dx != 0 or send_dy != 0:
-            send_input_delta(send_dx, send_dy)
+        bx = 2 * inv * eased * mid_bx + eased * eased * x
+        by = 2 * inv * eased * mid_by + eased * eased * y
+        # Cumul envoyé après chaque pas = partie entière de la position courbe ;
+        # les deltas entiers sont ses différences successives (restes reportés)
+        sent_x = np.trunc(bx).astype(np.int64)
+        sent_y = np.trunc(by).astype(np.int64)
+        step_dx = np.diff(sent_x, prepend=0).tolist()
+        step_dy = np.diff(sent_y, prepend=0).tolist()
+        events = [(ddx, ddy, 0x0001) if ddx or ddy else None  # MOVE relatif
+                  for ddx, ddy in zip(step_dx, step_dy)]
+        send_dx = round(x - int(sent_x[-1]))
+        send_dy = round(y - int(sent_y[-1]))
+        final = (send_dx, send_dy, 0x0001) if send_dx != 0 or send_dy != 0 else None
     else:
-        for i in range(1, steps + 1):
-            t = i / steps
-            eased = (1 - math.cos(t * math.pi)) / 2
-            inv = 1 - eased
-            bx = inv * inv * start_x + 2 * inv * eased * mid_bx + eased * eased * target_x
-            by = inv * inv * start_y + 2 * inv * eased * mid_by + eased * eased * target_y
-            curr_x = int(bx) + (random.randint(-1, 1) if i < steps else 0)
-            curr_y = int(by) + (random.randint(-1, 1) if i < steps else 0)
-            send_input_move(curr_x, curr_y)
-            time.sleep(duration / steps)
-        send_input_move(target_x, target_y)
+        bx = inv * inv * start_x + 2 * inv * eased * mid_bx + eased * eased * target_x
+        by = inv * inv * start_y + 2 * inv * eased * mid_by + eased * eased * target_y
+        jitter = np.random.randint(-1, 2, size=(2, steps))
+        jitter[:, -1] = 0  # le dernier pas tombe pile sur la cible
+        curr_x = np.trunc(bx).astype(np.int64) + jitter[0]
+        curr_y = np.trunc(by).astype(np.int64) + jitter[1]
+        norm_x = (curr_x * 65535 / (_SCREEN_W - 1)).astype(np.int64).tolist()
+        norm_y = (curr_y * 65535 / (_SCREEN_H - 1)).astype(np.int64).tolist()
+        events = [(nx, ny, 0x0001 | 0x8000) for nx, ny in zip(norm_x, norm_y)]  # MOVE | ABSOLUTE
+        final = _abs_move_event(target_x, target_y)
+
+    if batched:
+        # Un seul passage user → kernel pour toute la trajectoire
+        events = [e for e in events if e is not None]
+        if final is not None:
+            events.append(final)
+        _mouse_send_inputs(events)
+        return True
+
+    # Échéances absolues : pas de dérive cumulée, cadence régulière entre les pas
+    step_ns = int(duration * 1e9 / steps)
+    deadline = time.perf_counter_ns() + step_ns
+    for event in events:
+        if event is not None:
+            _mouse_send_input(*event)
+        if not _wait_until(deadline, get_active_status):
+            return False
+        deadline += step_ns
+    if final is not None:
+        _mouse_send_input(*final)
+    return True
 
 
 # ============================================================================
@@ -368,44 +510,32 @@ def _get_scan_code(vk_code: int) -> int:
     return ctypes.windll.user32.MapVirtualKeyW(vk_code, 0)
 
 
-def _is_extended_key(vk_code: int) -> bool:
-    return vk_code in (
-        win32con.VK_UP, win32con.VK_DOWN, win32con.VK_LEFT, win32con.VK_RIGHT,
-        win32con.VK_INSERT, win32con.VK_DELETE,
-        win32con.VK_HOME, win32con.VK_END,
-        win32con.VK_PRIOR, win32con.VK_NEXT,
-    )
+_EXTENDED_KEYS = frozenset((
+    win32con.VK_UP, win32con.VK_DOWN, win32con.VK_LEFT, win32con.VK_RIGHT,
+    win32con.VK_INSERT, win32con.VK_DELETE,
+    win32con.VK_HOME, win32con.VK_END,
+    win32con.VK_PRIOR, win32con.VK_NEXT,
+))
 
+# key → (vk_code, scan_code, ext_flag), rempli au premier usage de chaque touche
+_KEY_CACHE: dict = {}
 
-def _send_key(vk_code: int, scan_code: int, flags: int) -> None:
-    """Interne : envoie un événement clavier via SendInput."""
-    PUL = ctypes.POINTER(ctypes.c_ulong)
 
-    class KeyBdInput(ctypes.Structure):
-        _fields_ = [("wVk", ctypes.c_ushort), ("wScan", ctypes.c_ushort),
-                    ("dwFlags", ctypes.c_ulong), ("time", ctypes.c_ulong),
-                    ("dwExtraInfo", PUL)]
+def _get_key_info(key):
+    """Interne : (vk_code, scan_code, ext_flag) d'une touche, sans MapVirtualKeyW si déjà vue."""
+    info = _KEY_CACHE.get(key)
+    if info is None:
+        vk_code = _get_key_code(key)
+        ext_flag = 0x0001 if vk_code in _EXTENDED_KEYS else 0
+        info = (vk_code, _get_scan_code(vk_code), ext_flag)
+        _KEY_CACHE[key] = info
+    return info
 
-    class HardwareInput(ctypes.Structure):
-        _fields_ = [("uMsg", ctypes.c_ulong), ("wParamL", ctypes.c_short),
-                    ("wParamH", ctypes.c_ushort)]
 
-    class MouseInput(ctypes.Structure):
-        _fields_ = [("dx", ctypes.c_long), ("dy", ctypes.c_long),
-                    ("mouseData", ctypes.c_ulong), ("dwFlags", ctypes.c_ulong),
-                    ("time", ctypes.c_ulong), ("dwExtraInfo", PUL)]
-
-    class Input_I(ctypes.Union):
-        _fields_ = [("ki", KeyBdInput), ("mi", MouseInput), ("hi", HardwareInput)]
-
-    class Input(ctypes.Structure):
-        _fields_ = [("type", ctypes.c_ulong), ("ii", Input_I)]
-
-    extra = ctypes.c_ulong(0)
-    ii_ = Input_I()
-    ii_.ki = KeyBdInput(vk_code, scan_code, flags, 0, ctypes.pointer(extra))
-    x = Input(ctypes.c_ulong(1), ii_)
-    ctypes.windll.user32.SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
+def _send_key(vk_code: int, scan_code: int, flags: int) -> None:
+    """Interne : envoie un événement clavier via SendInput."""
+    inp = _Input(1, _InputI(ki=_KeyBdInput(vk_code, scan_code, flags, 0, _extra_ptr)))
+    _SendInput(1, inp, _INPUT_SIZE)
 
 
 def press(key, hold: bool = False) -> None:
@@ -417,9 +547,7 @@ def press(key, hold: bool = False) -> None:
         hold: Si True, maintient la touche enfoncée sans la relâcher.
     """
     global _held_keys
-    key_code = _get_key_code(key)
-    scan_code = _get_scan_code(key_code)
-    ext_flag = 0x0001 if _is_extended_key(key_code) else 0
+    key_code, scan_code, ext_flag = _get_key_info(key)
 
     if hold:
         if key_code not in _held_keys:
@@ -434,9 +562,7 @@ def press(key, hold: bool = False) -> None:
 def release(key) -> None:
     """Relâche une touche maintenue avec press(hold=True)."""
     global _held_keys
-    key_code = _get_key_code(key)
-    scan_code = _get_scan_code(key_code)
-    ext_flag = 0x0001 if _is_extended_key(key_code) else 0
+    key_code, scan_code, ext_flag = _get_key_info(key)
 
     if key_code in _held_keys:
         _send_key(key_code, scan_code, ext_flag | 0x0002)
@@ -451,49 +577,42 @@ def release_all() -> None:
     release_right_click()
 
 
-def write(text: str, delay: float = 0.05) -> None:
+def write(text: str, delay: float = 0.05, bulk: bool = False) -> None:
     """
     Écrit une chaîne de caractères en Unicode (accents, symboles supportés).
 
     Args:
         text:  Texte à écrire.
         delay: Délai entre chaque caractère en secondes (défaut : 0.05).
+        bulk:  Si True, envoie tout le texte en un seul appel SendInput
+               (delay est alors ignoré).
     """
     KEYEVENTF_UNICODE = 0x0004
     KEYEVENTF_KEYUP   = 0x0002
-    PUL = ctypes.POINTER(ctypes.c_ulong)
 
-    class KeyBdInput(ctypes.Structure):
-        _fields_ = [("wVk", ctypes.c_ushort), ("wScan", ctypes.c_ushort),
-                    ("dwFlags", ctypes.c_ulong), ("time", ctypes.c_ulong),
-                    ("dwExtraInfo", PUL)]
-
-    class HardwareInput(ctypes.Structure):
-        _fields_ = [("uMsg", ctypes.c_ulong), ("wParamL", ctypes.c_short),
-                    ("wParamH", ctypes.c_ushort)]
-
-    class MouseInput(ctypes.Structure):
-        _fields_ = [("dx", ctypes.c_long), ("dy", ctypes.c_long),
-                    ("mouseData", ctypes.c_ulong), ("dwFlags", ctypes.c_ulong),
-                    ("time", ctypes.c_ulong), ("dwExtraInfo", PUL)]
-
-    class Input_I(ctypes.Union):
-        _fields_ = [("ki", KeyBdInput), ("mi", MouseInput), ("hi", HardwareInput)]
+    if not text:
+        return
 
-    class Input(ctypes.Structure):
-        _fields_ = [("type", ctypes.c_ulong), ("ii", Input_I)]
+    # Chaque caractère = KEYDOWN + KEYUP consécutifs dans le même tableau INPUT
+    n = len(text) * 2 if bulk else 2
+    inputs = (_Input * n)()
+    for inp in inputs:
+        inp.type = 1  # INPUT_KEYBOARD
+
+    if bulk:
+        for i, char in enumerate(text):
+            unicode_value = ord(char)
+            inputs[2 * i].ii.ki = _KeyBdInput(0, unicode_value, KEYEVENTF_UNICODE, 0, _extra_ptr)
+            inputs[2 * i + 1].ii.ki = _KeyBdInput(0, unicode_value, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP,
+                                                  0, _extra_ptr)
+        _SendInput(n, inputs, _INPUT_SIZE)
+        return
 
     for char in text:
         unicode_value = ord(char)
-        extra = ctypes.c_ulong(0)
-        ii_ = Input_I()
-        ii_.ki = KeyBdInput(0, unicode_value, KEYEVENTF_UNICODE, 0, ctypes.pointer(extra))
-        x = Input(ctypes.c_ulong(1), ii_)
-        ctypes.windll.user32.SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
-        time.sleep(0.005)
-        ii_.ki = KeyBdInput(0, unicode_value, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP, 0, ctypes.pointer(extra))
-        x = Input(ctypes.c_ulong(1), ii_)
-        ctypes.windll.user32.SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
+        inputs[0].ii.ki = _KeyBdInput(0, unicode_value, KEYEVENTF_UNICODE, 0, _extra_ptr)
+        inputs[1].ii.ki = _KeyBdInput(0, unicode_value, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP, 0, _extra_ptr)
+        _SendInput(2, inputs, _INPUT_SIZE)
         time.sleep(delay)
 
 
@@ -510,6 +629,134 @@ def _to_screen_coords(x: int, y: int, window_title=None):
     return win32gui.ClientToScreen(hwnd, (x, y))
 
 
+# Contexte GDI partagé : DC écran et DC mémoire créés une seule fois au chargement.
+_SRCCOPY = 0x00CC0020
+_DIB_RGB_COLORS = 0
+
+
+class _BitmapInfoHeader(ctypes.Structure):
+    _fields_ = [("biSize", ctypes.wintypes.DWORD), ("biWidth", ctypes.wintypes.LONG),
+                ("biHeight", ctypes.wintypes.LONG), ("biPlanes", ctypes.wintypes.WORD),
+                ("biBitCount", ctypes.wintypes.WORD), ("biCompression", ctypes.wintypes.DWORD),
+                ("biSizeImage", ctypes.wintypes.DWORD), ("biXPelsPerMeter", ctypes.wintypes.LONG),
+                ("biYPelsPerMeter", ctypes.wintypes.LONG), ("biClrUsed", ctypes.wintypes.DWORD),
+                ("biClrImportant", ctypes.wintypes.DWORD)]
+
+
+class _BitmapInfo(ctypes.Structure):
+    _fields_ = [("bmiHeader", _BitmapInfoHeader), ("bmiColors", ctypes.wintypes.DWORD * 3)]
+
+
+_user32.GetDC.argtypes = [ctypes.wintypes.HWND]
+_user32.GetDC.restype = ctypes.wintypes.HDC
+_user32.ReleaseDC.argtypes = [ctypes.wintypes.HWND, ctypes.wintypes.HDC]
+_gdi32.CreateCompatibleDC.argtypes = [ctypes.wintypes.HDC]
+_gdi32.CreateCompatibleDC.restype = ctypes.wintypes.HDC
+_gdi32.CreateDIBSection.argtypes = [ctypes.wintypes.HDC, ctypes.POINTER(_BitmapInfo),
+                                    ctypes.wintypes.UINT, ctypes.POINTER(ctypes.c_void_p),
+                                    ctypes.wintypes.HANDLE, ctypes.wintypes.DWORD]
+_gdi32.CreateDIBSection.restype = ctypes.wintypes.HBITMAP
+_gdi32.SelectObject.argtypes = [ctypes.wintypes.HDC, ctypes.wintypes.HGDIOBJ]
+_gdi32.SelectObject.restype = ctypes.wintypes.HGDIOBJ
+_gdi32.BitBlt.argtypes = [ctypes.wintypes.HDC, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                          ctypes.c_int, ctypes.wintypes.HDC, ctypes.c_int, ctypes.c_int,
+                          ctypes.wintypes.DWORD]
+_gdi32.BitBlt.restype = ctypes.wintypes.BOOL
+_gdi32.DeleteObject.argtypes = [ctypes.wintypes.HGDIOBJ]
+_gdi32.DeleteDC.argtypes = [ctypes.wintypes.HDC]
+
+
+def _create_dib(width: int, height: int):
+    """Interne : crée une DIB 32 bits top-down. Retourne (hbitmap, adresse des pixels BGRA)."""
+    bmi = _BitmapInfo()
+    bmi.bmiHeader.biSize = ctypes.sizeof(_BitmapInfoHeader)
+    bmi.bmiHeader.biWidth = width
+    bmi.bmiHeader.biHeight = -height  # hauteur négative = lignes de haut en bas
+    bmi.bmiHeader.biPlanes = 1
+    bmi.bmiHeader.biBitCount = 32
+    bits = ctypes.c_void_p()
+    hbmp = _gdi32.CreateDIBSection(None, ctypes.byref(bmi), _DIB_RGB_COLORS,
+                                   ctypes.byref(bits), None, 0)
+    if not hbmp:
+        raise OSError("CreateDIBSection a échoué")
+    return hbmp, bits.value
+
+
+_gdi_lock = threading.Lock()
+_hdc_screen = _user32.GetDC(None)
+_pixel_dc = _gdi32.CreateCompatibleDC(_hdc_screen)
+_pixel_bmp, _pixel_bits = _create_dib(1, 1)
+_gdi32.SelectObject(_pixel_dc, _pixel_bmp)
+_pixel_buf = (ctypes.c_uint8 * 4).from_address(_pixel_bits)
+
+
+class _ScreenGrabber:
+    """
+    Interne : capture de zones d'écran dans une DIB réutilisée d'un appel à l'autre.
+    La DIB n'est réallouée que si la taille demandée (w, h) change : la position
+    n'est qu'un paramètre du BitBlt.
+    """
+
+    def __init__(self):
+        self._dc = _gdi32.CreateCompatibleDC(_hdc_screen)
+        self._bmp = None
+        self._size = None
+        self._view = None
+
+    def grab(self, x: int, y: int, width: int, height: int):
+        """
+        Capture la zone et retourne un ndarray (height, width, 4) BGRA.
+        Le tableau pointe directement sur la DIB : il est écrasé au prochain grab
+        (appeler sous _gdi_lock et copier si besoin de le conserver).
+        """
+        size = (width, height)
+        if size != self._size:
+            self._allocate(width, height)
+            self._size = size
+        if not _gdi32.BitBlt(self._dc, 0, 0, width, height, _hdc_screen, x, y, _SRCCOPY):
+            raise OSError("BitBlt a échoué")
+        _gdi32.GdiFlush()
+        return self._view
+
+    def _allocate(self, width: int, height: int) -> None:
+        hbmp, bits = _create_dib(width, height)
+        _gdi32.SelectObject(self._dc, hbmp)
+        if self._bmp:
+            _gdi32.DeleteObject(self._bmp)
+        self._bmp = hbmp
+        buf = (ctypes.c_uint8 * (width * height * 4)).from_address(bits)
+        self._view = np.frombuffer(buf, dtype=np.uint8).reshape(height, width, 4)
+
+    def close(self) -> None:
+        self._view = None
+        self._size = None
+        _gdi32.DeleteDC(self._dc)
+        if self._bmp:
+            _gdi32.DeleteObject(self._bmp)
+            self._bmp = None
+
+
+_screen_grabber = _ScreenGrabber()
+
+
+def _grab_ndarray(x: int, y: int, width: int, height: int):
+    """
+    Interne : capture écran → ndarray (height, width, 4) BGRA, sans passer par PIL.
+    À appeler sous _gdi_lock ; le tableau est réutilisé par la capture suivante.
+    """
+    return _screen_grabber.grab(x, y, width, height)
+
+
+def _release_gdi() -> None:
+    _screen_grabber.close()
+    _gdi32.DeleteDC(_pixel_dc)
+    _gdi32.DeleteObject(_pixel_bmp)
+    _user32.ReleaseDC(None, _hdc_screen)
+
+
+atexit.register(_release_gdi)
+
+
 def get_pixel_color(x: int, y: int, window_title=None):
     """
     Récupère la couleur d'un pixel.
@@ -522,12 +769,19 @@ def get_pixel_color(x: int, y: int, window_title=None):
         Tuple (R, G, B) ou None si erreur.
     """
     sx, sy = _to_screen_coords(x, y, window_title)
-    hdc = ctypes.windll.user32.GetDC(0)
-    color = ctypes.windll.gdi32.GetPixel(hdc, sx, sy)
-    ctypes.windll.user32.ReleaseDC(0, hdc)
-    if color < 0:
+    # Hors de l'écran virtuel, BitBlt réussit quand même (pixel noir ou périmé) :
+    # on renvoie None comme GetPixel (CLR_INVALID)
+    vx, vy = _user32.GetSystemMetrics(76), _user32.GetSystemMetrics(77)
+    vw, vh = _user32.GetSystemMetrics(78), _user32.GetSystemMetrics(79)
+    if not (vx <= sx < vx + vw and vy <= sy < vy + vh):
         return None
-    return (color & 0xFF, (color >> 8) & 0xFF, (color >> 16) & 0xFF)
+    # BitBlt 1×1 vers la DIB en cache : bien plus rapide que GetPixel en boucle
+    with _gdi_lock:
+        if not _gdi32.BitBlt(_pixel_dc, 0, 0, 1, 1, _hdc_screen, sx, sy, _SRCCOPY):
+            return None
+        _gdi32.GdiFlush()
+        pb, pg, pr = _pixel_buf[0], _pixel_buf[1], _pixel_buf[2]  # BGRA
+    return (pr, pg, pb)
 
 
 def check_pixel_color(x: int, y: int, r: int, g: int, b: int,
@@ -551,10 +805,17 @@ def check_pixel_color(x: int, y: int, r: int, g: int, b: int,
     return abs(pr - r) <= tolerance and abs(pg - g) <= tolerance and abs(pb - b) <= tolerance
 
 
+# Prototype fixé une fois (get_cursor_pos est souvent appelé en boucle) ; le POINT
+# reste alloué par appel pour que deux threads ne partagent pas le même tampon
+_GetCursorPos = _user32.GetCursorPos
+_GetCursorPos.argtypes = [ctypes.POINTER(ctypes.wintypes.POINT)]
+_GetCursorPos.restype = ctypes.wintypes.BOOL
+
+
 def get_cursor_pos():
     """Retourne la position actuelle du curseur (x, y)."""
     point = ctypes.wintypes.POINT()
-    ctypes.windll.user32.GetCursorPos(ctypes.byref(point))
+    _GetCursorPos(ctypes.byref(point))
     return point.x, point.y
 
 
@@ -573,11 +834,28 @@ def screenshot_region(x: int, y: int, width: int, height: int, window_title=None
         width, height: Taille de la zone.
         window_title:  Si fourni, x/y sont relatifs à la zone client.
     """
-    from PIL import ImageGrab
     sx, sy = _to_screen_coords(x, y, window_title)
     return ImageGrab.grab(bbox=(sx, sy, sx + width, sy + height))
 
 
+# Boucle asyncio persistante pour l'OCR, démarrée au premier read_text
+_ocr_loop = None
+_ocr_loop_lock = threading.Lock()
+
+
+def _get_ocr_loop():
+    """Interne : retourne la boucle OCR, qui tourne dans un thread daemon dédié."""
+    global _ocr_loop
+    if _ocr_loop is None:
+        with _ocr_loop_lock:
+            if _ocr_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="urmacro-ocr",
+                                 daemon=True).start()
+                _ocr_loop = loop
+    return _ocr_loop
+
+
 def read_text(x: int, y: int, width: int, height: int,
               window_title=None, lang: str = 'fr') -> str:
     """
@@ -590,28 +868,109 @@ def read_text(x: int, y: int, width: int, height: int,
 
     Nécessite : pip install urmacro[ocr]
     """
-    try:
-        import winocr
-    except ImportError:
+    if winocr is None:
         raise ImportError("winocr est requis : pip install urmacro[ocr]")
 
-    import asyncio
     img = screenshot_region(x, y, width, height, window_title)
 
     async def _ocr():
         result = await winocr.recognize_pil(img, lang=lang)
         return result.text
 
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = None
+    # Même chemin qu'il y ait ou non une boucle asyncio dans le thread appelant
+    return asyncio.run_coroutine_threadsafe(_ocr(), _get_ocr_loop()).result()
+
+
+def _color_mask(bgra, r: int, g: int, b: int, tolerance: int):
+    """Interne : masque booléen (H, W) des pixels d'un tableau BGRA proches de (r, g, b)."""
+    # |c - ref| <= tol  ⇔  ref - tol <= c <= ref + tol : comparaisons directes en
+    # uint8, sans copie int16 du tableau ni calcul d'abs
+    mask = None
+    for channel, ref in ((2, r), (1, g), (0, b)):
+        c = bgra[..., channel]
+        lo, hi = ref - tolerance, ref + tolerance
+        if lo > 255 or hi < 0 or lo > hi:
+            return np.zeros(bgra.shape[:2], dtype=bool)
+        in_range = (c >= max(lo, 0)) & (c <= min(hi, 255))
+        mask = in_range if mask is None else mask & in_range
+    return mask
+
+
+# Noyaux Numba optionnels (pip install urmacropkg[fast]) : une seule passe sur le
+# tableau BGRA, sans masque (H, W) intermédiaire ; sinon repli sur NumPy
+if njit is not None:
+    @njit(cache=True, boundscheck=False)
+    def _find_color_nb(bgra, r, g, b, tolerance, from_end, x_step, y_step):
+        h, w = bgra.shape[0], bgra.shape[1]
+        for iy in range(0, h, y_step):
+            py = h - 1 - iy if from_end else iy
+            for ix in range(0, w, x_step):
+                px = w - 1 - ix if from_end else ix
+                if (r - tolerance <= bgra[py, px, 2] <= r + tolerance and
+                        g - tolerance <= bgra[py, px, 1] <= g + tolerance and
+                        b - tolerance <= bgra[py, px, 0] <= b + tolerance):
+                    return px, py
+        return -1, -1
+
+    @njit(cache=True, boundscheck=False)
+    def _color_bounds_nb(bgra, r, g, b, tolerance):
+        h, w = bgra.shape[0], bgra.shape[1]
+        min_x, min_y, max_x, max_y = w, h, -1, -1
+        for py in range(h):
+            for px in range(w):
+                if (r - tolerance <= bgra[py, px, 2] <= r + tolerance and
+                        g - tolerance <= bgra[py, px, 1] <= g + tolerance and
+                        b - tolerance <= bgra[py, px, 0] <= b + tolerance):
+                    if px < min_x: min_x = px
+                    if py < min_y: min_y = py
+                    if px > max_x: max_x = px
+                    if py > max_y: max_y = py
+        return min_x, min_y, max_x, max_y
+else:
+    _find_color_nb = None
+    _color_bounds_nb = None
+
+
+def _find_color_in(bgra, r: int, g: int, b: int, tolerance: int,
+                   from_end: bool, x_step: int, y_step: int):
+    """Interne : (px, py) du premier pixel correspondant dans l'ordre de scan, ou None."""
+    if _find_color_nb is not None:
+        px, py = _find_color_nb(bgra, r, g, b, tolerance, from_end, x_step, y_step)
+        return None if px < 0 else (int(px), int(py))
+
+    mask = _color_mask(bgra, r, g, b, tolerance)
+    # Ordre de scan : lignes puis colonnes, depuis le coin bas-droite si from_end
+    if from_end:
+        mask = mask[::-1, ::-1]
+    scan = mask[::y_step, ::x_step]
+
+    idx = int(np.argmax(scan))  # premier True en ordre ligne par ligne
+    if not scan.flat[idx]:
+        return None
+    iy, ix = np.unravel_index(idx, scan.shape)
+    py, px = int(iy) * y_step, int(ix) * x_step
+    if from_end:
+        py, px = mask.shape[0] - 1 - py, mask.shape[1] - 1 - px
+    return px, py
+
+
+def _color_bounds_in(bgra, r: int, g: int, b: int, tolerance: int):
+    """Interne : (min_x, min_y, max_x, max_y) des pixels correspondants, ou None."""
+    if _color_bounds_nb is not None:
+        min_x, min_y, max_x, max_y = _color_bounds_nb(bgra, r, g, b, tolerance)
+        return None if max_x < 0 else (int(min_x), int(min_y), int(max_x), int(max_y))
+
+    mask = _color_mask(bgra, r, g, b, tolerance)
+    rows = mask.any(axis=1)
+    if not rows.any():
+        return None
+    cols = mask.any(axis=0)
 
-    if loop is not None:
-        import concurrent.futures
-        with concurrent.futures.ThreadPoolExecutor() as pool:
-            return pool.submit(lambda: asyncio.run(_ocr())).result()
-    return asyncio.run(_ocr())
+    min_y = int(np.argmax(rows))
+    max_y = len(rows) - 1 - int(np.argmax(rows[::-1]))
+    min_x = int(np.argmax(cols))
+    max_x = len(cols) - 1 - int(np.argmax(cols[::-1]))
+    return min_x, min_y, max_x, max_y
 
 
 def find_color(x: int, y: int, width: int, height: int,
@@ -632,20 +991,16 @@ def find_color(x: int, y: int, width: int, height: int,
     Returns:
         (px, py) du premier pixel trouvé, ou False.
     """
-    from PIL import ImageGrab
+    if width <= 0 or height <= 0:
+        return False
     sx, sy = _to_screen_coords(x, y, window_title)
-    img = ImageGrab.grab(bbox=(sx, sy, sx + width, sy + height))
-    pixels = img.load()
-
-    y_range = range(height - 1, -1, -y_step) if direction == 'end' else range(0, height, y_step)
-    x_range = range(width - 1, -1, -x_step) if direction == 'end' else range(0, width, x_step)
-
-    for py in y_range:
-        for px in x_range:
-            pr, pg, pb = pixels[px, py][:3]
-            if abs(pr - r) <= tolerance and abs(pg - g) <= tolerance and abs(pb - b) <= tolerance:
-                return (x + px, y + py)
-    return False
+    with _gdi_lock:
+        found = _find_color_in(_grab_ndarray(sx, sy, width, height), r, g, b, tolerance,
+                               direction == 'end', x_step, y_step)
+    if found is None:
+        return False
+    px, py = found
+    return (x + px, y + py)
 
 
 def find_color_bounds(x: int, y: int, width: int, height: int,
@@ -659,32 +1014,18 @@ def find_color_bounds(x: int, y: int, width: int, height: int,
     Returns:
         (x1, y1, x2, y2) ou False si aucun pixel trouvé.
     """
+    if width <= 0 or height <= 0:
+        return False
     ref_color = get_pixel_color(ref_x, ref_y, window_title)
     if ref_color is None:
         return False
 
-    from PIL import ImageGrab
     sx, sy = _to_screen_coords(x, y, window_title)
-    img = ImageGrab.grab(bbox=(sx, sy, sx + width, sy + height))
-    pixels = img.load()
-    ref_r, ref_g, ref_b = ref_color
-
-    min_x, min_y = width, height
-    max_x, max_y = -1, -1
-
-    for py in range(height):
-        for px in range(width):
-            pr, pg, pb = pixels[px, py][:3]
-            if (abs(pr - ref_r) <= tolerance and
-                    abs(pg - ref_g) <= tolerance and
-                    abs(pb - ref_b) <= tolerance):
-                if px < min_x: min_x = px
-                if py < min_y: min_y = py
-                if px > max_x: max_x = px
-                if py > max_y: max_y = py
-
-    if max_x == -1:
+    with _gdi_lock:
+        bounds = _color_bounds_in(_grab_ndarray(sx, sy, width, height), *ref_color, tolerance)
+    if bounds is None:
         return False
+    min_x, min_y, max_x, max_y = bounds
     return (x + min_x, y + min_y, x + max_x, y + max_y)
 
 
@@ -3,45 +3,100 @@ Utilitaires internes — urmacro
 """
 
 import time
+import atexit
+import ctypes
 
+# Timer système à 1ms : sans ça, time.sleep / Event.wait arrondissent à ~15.6ms
+# sous Windows et dépassent régulièrement l'échéance avant le spin-wait final
+try:
+    ctypes.windll.winmm.timeBeginPeriod(1)
+    atexit.register(ctypes.windll.winmm.timeEndPeriod, 1)
+except (AttributeError, OSError):
+    pass
 
-def sleep_interruptible(duration: float, get_active_status) -> bool:
+# Fenêtre finale gérée en spin-wait (> granularité du timer à 1ms)
+_SPIN_WINDOW = 0.002
+
+
+def sleep_interruptible(duration: float, get_active_status=None, stop_event=None) -> bool:
     """
-    Sleep interruptible qui vérifie régulièrement si la macro doit s'arrêter.
+    Sleep interruptible qui s'arrête dès que la macro doit s'arrêter.
 
     Args:
         duration:          Durée du sleep en secondes.
         get_active_status: Fonction sans argument qui retourne True si la macro
                            doit continuer à tourner, False pour l'arrêter.
+        stop_event:        threading.Event optionnel ; s'il est set(), le sleep
+                           est interrompu immédiatement (sans polling).
 
     Returns:
         True  si le sleep s'est terminé normalement.
-        False si le sleep a été interrompu (get_active_status() → False).
+        False si le sleep a été interrompu (get_active_status() → False
+              ou stop_event set).
 
     Example:
         if not sleep_interruptible(1.5, get_active_status):
             return   # macro arrêtée pendant le sleep
+
+        stop = threading.Event()   # stop.set() depuis le thread de contrôle
+        if not sleep_interruptible(1.5, stop_event=stop):
+            return
     """
     # perf_counter = timer haute résolution, insensible aux ajustements système
     end = time.perf_counter() + duration
-    check_interval = 0.05  # vérification toutes les 50ms
+
+    if stop_event is not None:
+        if get_active_status is not None and not get_active_status():
+            return False
+        # Attente bloquante : aucun réveil inutile, réveil immédiat sur set()
+        remaining = end - time.perf_counter()
+        if remaining > _SPIN_WINDOW and stop_event.wait(remaining - _SPIN_WINDOW):
+            return False
+        # Spin-wait pour les dernières ms
+        while time.perf_counter() < end:
+            pass
+        return not stop_event.is_set()
+
+    check_interval = 0.1  # vérification toutes les 100ms
 
     while True:
-        if not get_active_status():
+        if get_active_status is not None and not get_active_status():
             return False
 
         remaining = end - time.perf_counter()
         if remaining <= 0:
             break
 
-        if remaining <= 0.001:
-            # Spin-wait pour les dernières 1ms
-            # Évite la granularité du scheduler Windows (~15ms)
+        if remaining <= _SPIN_WINDOW:
+            # Spin-wait pour les dernières ms
             while time.perf_counter() < end:
                 pass
             break
 
-        # On laisse 1ms de marge pour ne jamais dépasser avec time.sleep
-        time.sleep(min(check_interval, remaining - 0.001))
+        # On s'arrête à _SPIN_WINDOW de l'échéance pour ne jamais dépasser avec time.sleep
+        time.sleep(min(check_interval, remaining - _SPIN_WINDOW))
+
+    return True
+
 
+def _wait_until(deadline_ns: int, get_active_status=None) -> bool:
+    """
+    Attend jusqu'à une échéance absolue exprimée en time.perf_counter_ns().
+    time.sleep pour le gros de l'attente, spin-wait pour les dernières ms.
+
+    Returns:
+        True  si l'échéance est atteinte.
+        False si get_active_status() est passé à False pendant l'attente.
+    """
+    if get_active_status is not None and not get_active_status():
+        return False
+
+    remaining = (deadline_ns - time.perf_counter_ns()) / 1e9
+    if remaining > _SPIN_WINDOW:
+        # On se réveille _SPIN_WINDOW avant l'échéance, le spin-wait fait le reste
+        time.sleep(remaining - _SPIN_WINDOW)
+
+    while time.perf_counter_ns() < deadline_ns:
+        if get_active_status is not None and not get_active_status():
+            return False
     return True